@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+
+import six
+
+
+class DAG(object):
+    """A directed acyclic graph of task numbers. Edges point from a
+    parent task to the child task that depends on it.
+
+    Adjacency is kept as plain lists keyed by node, in the order the
+    edges were added. The lists returned by :meth:`successors` and
+    :meth:`predecessors` are the stored lists; don't modify them.
+    """
+
+    def __init__(self):
+        self._succ = dict()
+        self._pred = dict()
+        self._edges = set()
+
+
+    def __contains__(self, n):
+        return n in self._succ
+
+
+    def __len__(self):
+        return len(self._succ)
+
+
+    def nodes(self):
+        return list(self._succ)
+
+
+    def add_node(self, n):
+        if n not in self._succ:
+            self._succ[n] = []
+            self._pred[n] = []
+
+
+    def add_edge(self, u, v):
+        if (u, v) in self._edges:
+            return
+        self.add_node(u)
+        self.add_node(v)
+        self._edges.add((u, v))
+        self._succ[u].append(v)
+        self._pred[v].append(u)
+
+
+    def remove_node(self, n):
+        for v in self._succ.pop(n):
+            self._pred[v].remove(n)
+            self._edges.discard((n, v))
+        for u in self._pred.pop(n):
+            self._succ[u].remove(n)
+            self._edges.discard((u, n))
+
+
+    def successors(self, n):
+        return self._succ[n]
+
+
+    def predecessors(self, n):
+        return self._pred[n]
+
+
+    def topological_sort(self, reverse=False, nodes=None):
+        """Return nodes in an order where every node comes after all
+        of its predecessors. Uses Kahn's algorithm.
+
+        :keyword reverse: Return the order with every node before all of
+          its predecessors instead. The sort starts from the nodes
+          without successors, so no reversal pass is needed.
+        :type reverse: bool
+
+        :keyword nodes: Only sort the subgraph made of these nodes. By
+          default, all nodes are sorted.
+        :type nodes: set
+
+        :raises ValueError: if the graph has a cycle
+        """
+        if reverse:
+            incoming, outgoing = self._succ, self._pred
+        else:
+            incoming, outgoing = self._pred, self._succ
+        if nodes is None:
+            degree = dict( (n, len(adj)) for n, adj in six.iteritems(incoming) )
+        else:
+            degree = dict( (n, sum(1 for m in incoming[n] if m in nodes))
+                           for n in nodes )
+        ready = deque( n for n, deg in six.iteritems(degree) if not deg )
+        order = []
+        while ready:
+            n = ready.popleft()
+            order.append(n)
+            for m in outgoing[n]:
+                if m not in degree:
+                    continue
+                degree[m] -= 1
+                if not degree[m]:
+                    ready.append(m)
+        if len(order) != len(degree):
+            raise ValueError("Graph contains a cycle")
+        return order
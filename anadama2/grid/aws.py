@@ -97,10 +97,11 @@ class AWSGridWorker(GridWorker):
             task.visible, task.kwargs, task.use_parse_sh) 
 
         task_name="task_"+str(task.task_no)
+        task_folder=grid_queue.get_task_folder(tmpdir, task.task_no)
         task_pkl_file_basename = task_name+".pkl"
-        task_pkl_file=os.path.join(tmpdir,task_pkl_file_basename)
+        task_pkl_file=os.path.join(task_folder,task_pkl_file_basename)
         task_result_pkl_file_basename = "result_"+task_name+".pkl"
-        task_result_pkl_file=os.path.join(tmpdir,task_result_pkl_file_basename)
+        task_result_pkl_file=os.path.join(task_folder,task_result_pkl_file_basename)
 
         # write the input pickle file
         resource = boto3.resource("s3")
@@ -27,6 +27,30 @@ if os.name == 'posix' and sys.version_info[0] < 3:
 else:
     import subprocess
 
+# the job id is the first decimal number in the submit command output
+_JOBID_REGEX = re.compile(r'\d+')
+
+# scale to convert the memory reported by the queue to MB, by unit suffix
+_MEMORY_UNIT_SCALE = {"K": 1/1024.0, "M": 1.0, "G": 1024.0}
+
+# compiled resource request formulas, keyed by the formula string
+_formula_cache = {}
+
+def _eval_formula(formula):
+    """ Evaluate a time/memory formula, compiling each distinct formula once """
+    # numbers (including values doubled for resubmission) need no evaluation
+    if isinstance(formula, six.integer_types + (float,)):
+        return formula
+    formula = str(formula)
+    code = _formula_cache.get(formula)
+    if code is None:
+        code = _formula_cache[formula] = compile(formula, "<resource request>", "eval")
+    return eval(code)
+
+def _scalar(request):
+    """ Get the requested amount from a time/memory request, without any max override """
+    return request[0] if isinstance(request, (list, tuple)) else request
+
 class GridJobRequires(object):
     """Defines the resources required for a task on the grid.
 
@@ -167,14 +191,22 @@ class Grid(object):
         runner.add_worker(runners.ParallelLocalWorker,
                           name="local", rate=jobs, default=True)
         runner.add_worker(self.worker, name=self.name, rate=grid_jobs)
+        # all grid tasks share the same queue and reporter
+        shared = (self.queue, workflow._reporter)
         runner.routes.update((
-            ( task_no, (self.name, list(extra)+[self.queue, workflow._reporter]) )
+            ( task_no, (self.name, extra+shared) )
             for task_no, extra in six.iteritems(self.task_data)
         ))
         return runner
 
 class GridQueue(object):
 
+    # the number of tasks with files in each temp directory folder
+    tasks_per_folder = 1000
+
+    # the format of the time limit in the grid script, from hours and minutes
+    time_format = "%02d:%02d:00"
+
     def __init__(self, partition, benchmark_on=None, submit_sleep=5):
         # check for short/long partitions
         if not isinstance(partition, list):
@@ -193,6 +225,14 @@ class GridQueue(object):
         # this is the rate for checking the job status, in seconds
         self.check_job_rate = 30
 
+        # this is the first wait before checking the job status, in seconds,
+        # doubled with each check (up to the rate above) while the status is unchanged
+        self.check_job_start_rate = 2
+
+        # this is the rate for checking the return code file between
+        # job status checks, in seconds
+        self.check_rc_rate = 5
+
         # this is the number of minutes to wait if there is an time out
         # socket error returned from the scheduler when running a command
         self.timeout_sleep = 1*60
@@ -206,6 +246,10 @@ class GridQueue(object):
         # this is the last time the queue was checked
         self.last_check = time.time()
         self.sacct = None
+        self.sacct_index = {}
+
+        # the last benchmark for each job id, with the time of the stats it was read from
+        self.benchmarks = {}
 
         # create a lock for jobs in queue
         self.lock_status = threading.Lock()
@@ -214,6 +258,12 @@ class GridQueue(object):
         # set if benchmarking should be run
         self.benchmark_on = benchmark_on
 
+        # the bash script template, built from submit_template on first use
+        self._bash_template = None
+
+        # the task file folders already created in the temp directory
+        self._task_folders = set()
+
     @staticmethod
     def submit_command(grid_script):
         raise NotImplementedError
@@ -221,6 +271,14 @@ class GridQueue(object):
     def submit_template(self):
         raise NotImplementedError
 
+    def bash_template(self):
+        """ Get the template for the grid script, building it only once """
+
+        if self._bash_template is None:
+            self._bash_template = string.Template("\n".join(["#!/bin/bash "] +
+                self.submit_template() + ["${command}", "${rc_command}"]))
+        return self._bash_template
+
     def job_failed(self,status):
         raise NotImplementedError
 
@@ -254,35 +312,48 @@ class GridQueue(object):
     def get_queue_status(self, refresh=None):
         """ Get the queue accounting stats """
 
-        # lock to prevent race conditions with status update
-        self.lock_status.acquire()
+        # return the current stats without locking if they are still fresh
+        if not refresh and self.sacct is not None and \
+            time.time() - self.last_check <= self.refresh_rate:
+            return self.sacct
 
-        # check the last time the queue was captured and refresh if set
-        current_time = time.time()
-        if ( current_time - self.last_check > self.refresh_rate ) or refresh or self.sacct is None:
-            self.last_check = current_time
-            logging.info("Getting latest queue info to refresh job status")
-            self.sacct = self.refresh_queue_status()
+        # lock to prevent race conditions with status update
+        with self.lock_status:
+            # check again in case another thread refreshed while waiting for the lock
+            current_time = time.time()
+            if ( current_time - self.last_check > self.refresh_rate ) or refresh or self.sacct is None:
+                logging.info("Getting latest queue info to refresh job status")
+                sacct = self.refresh_queue_status()
+                self.sacct_index = self.index_queue_status(sacct)
+                self.sacct = sacct
+                # only mark the stats as fresh once they are in place, so
+                # readers wait on the lock while the refresh is running
+                self.last_check = current_time
+
+            return self.sacct
 
-        self.lock_status.release()
+    @staticmethod
+    def index_queue_status(queue_status):
+        """ Group the queue stats by job id """
 
-        return self.sacct
+        index = {}
+        for stats in queue_status:
+            try:
+                index.setdefault(stats[0],[]).append(stats)
+            except IndexError:
+                pass
+        return index
 
     def get_all_stats_for_jobid(self,jobid):
         """ Get all the stats for a specific job id """
 
         # use the existing stats, to get the information for the jobid
-
-        try:
-            job_stats=list(filter(lambda x: x[0].startswith(jobid),self.get_queue_status()))
-            #print(job_stats) #banana
-        except IndexError:
-            job_stats=[]
+        self.get_queue_status()
+        job_stats=self.sacct_index.get(jobid)
 
         # if the job stats are not found for the job, return an NA state
         if not job_stats:
-            print(self.get_queue_status())
-            print("could not find stats for " + jobid)
+            logging.debug("Could not find stats for grid job id %s", jobid)
             job_stats=[[jobid,"Pending","NA","NA","NA"]]
 
         return job_stats
@@ -313,6 +384,11 @@ class GridQueue(object):
     def get_benchmark(self, jobid, wait=None):
         """ Get the benchmarking data for the jobid """
 
+        # reuse the benchmark read from the current queue stats if there is one
+        last_check, benchmark = self.benchmarks.get(jobid, (None, None))
+        if not wait and last_check == self.last_check:
+            return benchmark
+
         # if the job is not shown to have finished running then
         # wait for the next queue refresh
         status=self.get_job_status(jobid)
@@ -320,6 +396,10 @@ class GridQueue(object):
             wait_time = abs(self.refresh_rate - (time.time() - self.last_check)) + 10
             time.sleep(wait_time)
 
+        # refresh the stats if needed, then note their time before reading
+        # them so a later refresh can only make the cached benchmark look older
+        self.get_queue_status()
+        last_check=self.last_check
         info=self.get_all_stats_for_jobid(jobid)
 
         try:
@@ -343,16 +423,21 @@ class GridQueue(object):
         except IndexError:
             memory="NA"
 
-        if "K" in memory:
-            # if memory is in KB, convert to MB
-            memory="{:.1f}".format(float(memory.replace("K",""))/1024.0)
-        elif "M" in memory:
-            memory="{:.1f}".format(float(memory.replace("M","")))
-        elif "G" in memory:
-            # if memory is in GB, convert to MB
-            memory="{:.1f}".format(float(memory.replace("G",""))*1024.0)
+        # convert memory with a KB/MB/GB unit suffix to MB
+        scale=_MEMORY_UNIT_SCALE.get(memory[-1:])
+        if scale:
+            memory="{:.1f}".format(float(memory[:-1])*scale)
+
+        # the benchmark only changes when the queue stats are refreshed
+        benchmark = (status, cpus, elapsed, memory)
+        self.benchmarks[jobid] = (last_check, benchmark)
+
+        return benchmark
 
-        return status, cpus, elapsed, memory
+    def clear_benchmark(self, jobid):
+        """ Remove the saved benchmark for a job that will not be checked again """
+
+        self.benchmarks.pop(jobid, None)
 
     def run_grid_command(self,command):
         """ Run the grid command and check for errors """
@@ -368,22 +453,27 @@ class GridQueue(object):
         else:
             #
             if type(command) is dict:
-                try:
-                    with open(command["script"], 'r') as f:
-                        script_text = f.read()
-                    logging.debug("Running lsf grid command: %s"," ".join(command))
-                    p = subprocess.Popen(command["cmd"], stdout=subprocess.PIPE, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
-                    stdout = p.communicate(input=script_text.encode())[0].decode('utf-8')
-#                    stdout=subprocess.check_output(command["cmd"], stdin=command["script"].encode(), stderr=subprocess.STDOUT).decode('utf-8')
-                except subprocess.CalledProcessError as err:
-                    error=err.output.decode('utf-8')
-                    stdout=error or "error"
+                with open(command["script"], 'r') as f:
+                    script_text = f.read()
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug("Running lsf grid command: %s"," ".join(command["cmd"]))
+                p = subprocess.Popen(command["cmd"], stdout=subprocess.PIPE, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+                out, err = p.communicate(input=script_text.encode())
+                stdout = out.decode('utf-8')
+                if p.returncode:
+                    # keep the stderr text out of the job id parsing
+                    error=err.decode('utf-8')
+                    logging.warning("Grid command failed: %s", error)
+                    stdout="error"
             else:
-                try:
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
                     logging.debug("Running grid command: %s"," ".join(command))
-                    stdout=subprocess.check_output(command, stderr=subprocess.STDOUT).decode('utf-8')
-                except subprocess.CalledProcessError as err:
-                    error=err.output.decode('utf-8')
+                # check the return code instead of raising on failure, as a
+                # failed grid command is an expected outcome here
+                p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                stdout = p.communicate()[0].decode('utf-8')
+                if p.returncode:
+                    error=stdout
                     stdout=error or "error"
 
         timeout_error=False
@@ -417,11 +507,9 @@ class GridQueue(object):
 
     @staticmethod
     def get_job_id_from_submit_output(stdout):
-        try:
-            # search for the decimal job id at any location in stdout
-            jobid=re.findall(r'\d+',stdout)[0]
-        except IndexError:
-            jobid="error"
+        # search for the decimal job id at any location in stdout
+        match=_JOBID_REGEX.search(stdout)
+        jobid=match.group(0) if match else "error"
 
         return jobid
 
@@ -449,29 +537,36 @@ class GridQueue(object):
 
         return jobid
 
+    def get_task_folder(self, dir, taskid):
+        """ Get the folder in the temp directory for the task files, keeping
+        the files for each set of tasks_per_folder tasks in a separate folder """
+
+        folder=os.path.join(dir,"%04d" % (int(taskid) // self.tasks_per_folder))
+        if not folder in self._task_folders:
+            try:
+                os.makedirs(folder)
+            except EnvironmentError:
+                if not os.path.isdir(folder):
+                    raise
+            self._task_folders.add(folder)
+        return folder
+
     def create_grid_script(self,partition,cpus,minutes,memory,command,taskid,dir,docker_image):
-        """ Create a grid script from the template also creating temp stdout and stderr files """
-
-        # create temp files for stdout, stderr, and return code
-        handle_out, out_file=tempfile.mkstemp(suffix=".out",prefix="task_"+str(taskid)+"_",dir=dir)
-        os.close(handle_out)
-        handle_err, error_file=tempfile.mkstemp(suffix=".err",prefix="task_"+str(taskid)+"_",dir=dir)
-        os.close(handle_err)
-        handle_rc, rc_file=tempfile.mkstemp(suffix=".rc",prefix="task_"+str(taskid)+"_",dir=dir)
-        os.close(handle_rc)
-
-        # add the remaining sections to the bash template
-        bash_template = string.Template("\n".join(["#!/bin/bash "] + self.submit_template() + ["${command}", "${rc_command}"]))
-
-        # convert the minutes to the time string "HH:MM:00"
-        hours, remaining_minutes = divmod(minutes, 60)
-        if self.__class__.__name__ == "LSFQueue":
-            time = "{:02d}:{:02d}".format(hours, remaining_minutes)
-        else:
-            time = "{:02d}:{:02d}:00".format(hours, remaining_minutes)
-        bash=bash_template.substitute(partition=partition,cpus=cpus,time=time,
+        """ Create a grid script from the template also naming temp stdout and stderr files """
+
+        # create the temp script file, naming the stdout, stderr, and return code
+        # files after it (these are written by the grid job)
+        file_handle, new_file=tempfile.mkstemp(suffix=".bash",prefix="task_"+str(taskid)+"_",
+            dir=self.get_task_folder(dir, taskid))
+        stem=new_file[:-len(".bash")]
+        out_file=stem+".out"
+        error_file=stem+".err"
+        rc_file=stem+".rc"
+
+        # convert the minutes to the time string (by default "HH:MM:00")
+        time = self.time_format % divmod(minutes, 60)
+        bash=self.bash_template().substitute(partition=partition,cpus=cpus,time=time,
             memory=memory,command=command,output=out_file,error=error_file,rc_command="export RC=$? ; echo $RC > "+rc_file+" ; bash -c 'exit $RC'")
-        file_handle, new_file=tempfile.mkstemp(suffix=".bash",prefix="task_"+str(taskid)+"_",dir=dir)
         os.write(file_handle,bytearray(bash, 'utf-8'))
         os.close(file_handle)
 
@@ -514,8 +609,9 @@ class GridWorker(threading.Thread):
     def run_task_function(cls, task, extra):
         (perf, tmpdir, grid_queue, reporter) = extra
 
-        # create a script to run the python function
-        pickle_script = picklerunner.PickleScript(task, tmpdir, "task_"+str(task.task_no))
+        # create a script to run the python function, in the folder for the task files
+        pickle_script = picklerunner.PickleScript(task,
+            grid_queue.get_task_folder(tmpdir, task.task_no), "task_"+str(task.task_no))
         pickle_task = pickle_script.create_task()
 
         # run the task as a command
@@ -549,23 +645,37 @@ class GridWorker(threading.Thread):
         # monitor job if submission was successful
         result, job_final_status = cls.check_submission_then_monitor_grid_job(grid_queue,
             task, jobid, out_file, error_file, rc_file, reporter)
+
+        # the requested time and memory as numbers, for the resubmission checks
+        time_requested = float(_eval_formula(_scalar(time)))
+        memory_requested = float(_eval_formula(_scalar(memory)))
+
         # if a timeout or memory max, resubmit at most three times
-        while ( grid_queue.job_timeout(job_final_status, jobid, time) or grid_queue.job_memkill(job_final_status, jobid, memory) ) and resubmission < 3:
+        while resubmission < 3:
+            # check the final status once per submission as the queue
+            # checks can require benchmarking the job
+            job_timed_out = grid_queue.job_timeout(job_final_status, jobid, time_requested)
+            if not job_timed_out and not grid_queue.job_memkill(job_final_status, jobid, memory_requested):
+                break
+
             resubmission+=1
+            grid_queue.clear_benchmark(jobid)
             # increase the memory or the time
-            if grid_queue.job_timeout(job_final_status, jobid, time):
+            if job_timed_out:
                 time = "({})*2".format(time) if isinstance(time,str) else time*2
+                time_requested = float(_eval_formula(_scalar(time)))
                 logging.info("Resubmission number %s of grid job for task id %s with 2x more time: %s minutes",
                     resubmission, task.task_no, time)
                 reporter.task_grid_status(task.task_no,jobid,"Resubmitting due to time out")
-            elif grid_queue.job_memkill(job_final_status, jobid, memory):
+            else:
                 memory = "({})*2".format(memory) if isinstance(memory,str) else memory*2
+                memory_requested = float(_eval_formula(_scalar(memory)))
                 logging.info("Resubmission number %s of grid job for task id %s with 2x more memory: %s MB",
                     resubmission, task.task_no, memory)
                 reporter.task_grid_status(task.task_no,jobid,"Resubmitting due to max memory")
 
             jobid, out_file, error_file, rc_file = cls.submit_grid_job(cores, time, memory,
-                partition, tmpdir, commands, task, grid_queue, reporter, docker_image)
+                partition, tmpdir, commands, task, grid_queue, reporter, docker_image, mem_per_core)
 
             # monitor job if submission was successful
             result, job_final_status = cls.check_submission_then_monitor_grid_job(grid_queue,
@@ -574,6 +684,7 @@ class GridWorker(threading.Thread):
         # get the benchmarking data if the job was submitted
         if not grid_queue.job_submission_failed(jobid):
             grid_queue.record_benchmark(jobid, task.task_no, reporter)
+        grid_queue.clear_benchmark(jobid)
 
         return result
 
@@ -609,12 +720,37 @@ class GridWorker(threading.Thread):
     def log_grid_output(taskid, file, file_type):
         """ Write the grid stdout/stderr files to the log """
 
+        # skip reading the file if it would not be logged
+        if not logging.getLogger().isEnabledFor(logging.INFO):
+            return
+
         try:
-            lines=open(file).readlines()
+            with open(file) as file_handle:
+                output=file_handle.read()
         except EnvironmentError:
-            lines=[]
+            output=""
+
+        # nothing to log for empty (or missing) output files
+        if not output:
+            return
+
+        logging.info("Grid %s from task id %s:\n%s",file_type, taskid, output)
 
-        logging.info("Grid %s from task id %s:\n%s",taskid, file_type, "".join(lines))
+    @staticmethod
+    def wait_for_rc_file(rc_file, timeout, interval):
+        """ Wait up to timeout seconds, returning True early if the return code file is written """
+
+        deadline = time.time() + timeout
+        while True:
+            try:
+                if rc_file and os.path.getsize(rc_file) > 0:
+                    return True
+            except EnvironmentError:
+                pass
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
 
     @staticmethod
     def get_return_code(file):
@@ -639,30 +775,30 @@ class GridWorker(threading.Thread):
             mem=[mem]
 
         try:
-            time[0]=eval(str(time[0]))
+            time[0]=_eval_formula(time[0])
         except TypeError:
             raise TypeError("Unable to evaluate time request for task: "+ time)
 
         try:
-            mem[0]=eval(str(mem[0]))
+            mem[0]=_eval_formula(mem[0])
         except TypeError:
             raise TypeError("Unable to evaluate memory request for task: "+ mem)
 
         # check for override with max
         if time[-1] and time[0] > time[-1]:
-            logging.info("Using override of max time from {0} reset to {1}".format(time[0],time[-1]))
+            logging.info("Using override of max time from %s reset to %s",time[0],time[-1])
             time=time[-1]
         else:
             time=time[0]
 
         if mem[-1] and mem[0] > mem[-1]:
-            logging.info("Using override of max mem from {0} reset to {1}".format(mem[0],mem[-1]))
+            logging.info("Using override of max mem from %s reset to %s",mem[0],mem[-1])
             mem=mem[-1]
         else:
             mem=mem[0]
         if mem_per_core:
             new_mem = mem/cores
-            logging.info("converting memory (%f) to memory per core (%f)" %(mem, new_mem))
+            logging.info("converting memory (%f) to memory per core (%f)", mem, new_mem)
             mem = new_mem
         return time, mem
 
@@ -687,11 +823,13 @@ class GridWorker(threading.Thread):
     def monitor_grid_job(cls, grid_queue, task, grid_jobid, out_file, error_file, rc_file, reporter):
         # poll to check for status
         grid_job_status=None
+        wait=grid_queue.check_job_start_rate
         for tries in itertools.count(1):
-            # only check status at intervals
-            time.sleep(grid_queue.check_job_rate)
+            # only check status at intervals, watching the return code file in between
+            rc_written = cls.wait_for_rc_file(rc_file, wait, grid_queue.check_rc_rate)
 
             # check the queue stats
+            last_status = grid_job_status
             grid_job_status = grid_queue.get_job_status(grid_jobid)
             reporter.task_grid_status_polling(task.task_no,grid_jobid,grid_job_status)
 
@@ -703,10 +841,16 @@ class GridWorker(threading.Thread):
                 break
 
             # check if the return code file is written
-            if rc_file and os.path.getsize(rc_file) > 0:
+            if rc_written:
                 logging.info("Return code file for job id %s shows it has stopped",task.task_no)
                 break
 
+            # check again soon after a status change, backing off while it stays the same
+            if grid_job_status != last_status:
+                wait=grid_queue.check_job_start_rate
+            else:
+                wait=min(wait*2, grid_queue.check_job_rate)
+
         # check if a grid error is written to the output file
         grid_job_status = grid_queue.get_job_status_from_stderr(error_file, grid_job_status, grid_jobid)
 
@@ -3,7 +3,6 @@ import os
 import sys
 import time
 import tempfile
-import getpass
 
 import six
 
@@ -75,6 +74,9 @@ class LSF(Grid):
 
 class LSFQueue(GridQueue):
 
+    # bsub -W takes the time limit as HH:MM
+    time_format = "%02d:%02d"
+
     def __init__(self, partition, benchmark_on=None, options=None, environment=None):
         super(LSFQueue, self).__init__(partition, benchmark_on)
         self.options=options
@@ -85,8 +87,14 @@ class LSFQueue(GridQueue):
         self.job_code_terminated="EXIT"
         self.job_code_deleted="EXIT"
 
-        self.all_failed_codes=[self.job_code_error,self.job_code_terminated,self.job_code_deleted]
-        self.all_stopped_codes=[self.job_code_completed]+self.all_failed_codes
+        self.all_failed_codes=frozenset([self.job_code_error,self.job_code_terminated,self.job_code_deleted])
+        self.all_stopped_codes=self.all_failed_codes.union([self.job_code_completed])
+
+        # the exit reasons LSF reports for jobs it killed, and for those
+        # killed for reaching their memory or run time limit
+        self.job_code_exit_reason="TERM_"
+        self.job_code_memkill="TERM_MEMLIMIT"
+        self.job_code_timeout="TERM_RUNLIMIT"
 
         # allow for jobs to be terminated when about to reach the memory requested
         self.memory_buffer = 1024
@@ -118,43 +126,59 @@ class LSFQueue(GridQueue):
 
     def job_failed(self,status):
         # check if the job has a status that it failed
-        return True if status in self.all_failed_codes else False
+        # (failed jobs have the exit code appended to the status, as in "EXIT:1")
+        return status.partition(":")[0] in self.all_failed_codes
 
     def job_stopped(self,status):
         # check if the job has a status which indicates it stopped running
-        return True if status in self.all_stopped_codes else False
+        return status.partition(":")[0] in self.all_stopped_codes
+
+    @staticmethod
+    def job_killed_by_signal(status):
+        # a job killed by a signal exits with 128 plus the signal number, as in "EXIT:137"
+        try:
+            return int(status.split(":")[1]) > 128
+        except (IndexError, ValueError):
+            return False
 
     def job_memkill(self, status, jobid, memory):
         # check if the job was killed because it used too much memory
         new_status, cpus, new_time, new_memory = self.get_benchmark(jobid)
 
-        # if memory is not yet available for the job, wait for a new benchmark
+        # use the exit reason if LSF reports one, as in "EXIT:130:TERM_MEMLIMIT: ..."
+        if self.job_code_exit_reason in new_status:
+            return self.job_code_memkill in new_status
+
+        # otherwise check if the job was killed (as by the OOM killer)
+        # when about to reach the memory requested
+        # (if memory is not yet available for the job, wait for a new benchmark)
         if new_memory == "NA":
             new_status, cpus, new_time, new_memory = self.get_benchmark(jobid, wait=True)
-        if type(memory) is list:
-            memory = memory[0]
         try:
-            exceed_allocation = True if (float(new_memory) + self.memory_buffer) > float(memory) else False
+            exceed_allocation = (float(new_memory) + self.memory_buffer) > memory
         except ValueError:
             exceed_allocation = False
 
-        return True if exceed_allocation and new_status == self.job_code_terminated else False
+        return exceed_allocation and self.job_killed_by_signal(new_status)
 
     def job_timeout(self, status, jobid, time):
-        # check if the job was killed because it used too much memory
+        # check if the job was killed because it ran out of time
         new_status, cpus, new_time, new_memory = self.get_benchmark(jobid)
 
-        # if time is not yet available for the job, wait for a new benchmark
+        # use the exit reason if LSF reports one, as in "EXIT:140:TERM_RUNLIMIT: ..."
+        if self.job_code_exit_reason in new_status:
+            return self.job_code_timeout in new_status
+
+        # otherwise check if the job was killed after running longer than requested
+        # (if time is not yet available for the job, wait for a new benchmark)
         if new_time == "NA":
             new_status, cpus, new_time, new_memory = self.get_benchmark(jobid, wait=True)
-        if type(time) is list:
-            time = time[0]
         try:
-            exceed_allocation = True if float(new_time) > float(time) else False
+            exceed_allocation = float(new_time) > time
         except ValueError:
             exceed_allocation = False
 
-        return True if exceed_allocation and new_status == self.job_code_terminated else False
+        return exceed_allocation and self.job_killed_by_signal(new_status)
 
     def refresh_queue_status(self):
         """ Get the latest status for the grid jobs using the same command for
@@ -163,72 +187,36 @@ class LSFQueue(GridQueue):
         # Get the jobid and state for all jobs pending/running/completed for the current user
         fmt = 'jobid jobindex stat job_name kill_reason exit_reason exit_code start_time run_time slots max_mem  delimiter="\t"'
         qacct_stdout=self.run_grid_command_resubmit(["bjobs","-a", "-noheader", "-o", fmt])
-        #qacct_stdout=self.run_grid_command_resubmit(["bacct","-u",getpass.getuser()])
-        #print(qacct_stdout)
         # info list should include jobid, state, cpus, time, and maxrss
         info=[]
-        job_status=[]
+        # many jobs report the same run time, so convert each distinct value once
+        run_time_minutes={}
 
         for line in qacct_stdout.split("\n"):
-            # get rid of header and unrelated jobs
-            if "anadama_job" in line:
-                linesp = line.split("\t")
+            linesp = line.split("\t")
+            # get rid of blank lines and unrelated jobs, checking only the job name column
+            if len(linesp) > 3 and linesp[3] == "anadama_job":
                 if linesp[2] == "EXIT":
-                    reason_or_status = "EXIT:" + linesp[6]
+                    # add the exit code and any kill/exit reasons, as in "EXIT:130:TERM_MEMLIMIT: ..."
+                    reasons = [reason for reason in (linesp[5], linesp[4]) if reason and reason != "-"]
+                    reason_or_status = ":".join(["EXIT", linesp[6]] + reasons)
                 else:
                     reason_or_status = linesp[2]
                 try:
+                    run_time = run_time_minutes.get(linesp[8])
+                    if run_time is None:
+                        run_time = run_time_minutes[linesp[8]] = float(linesp[8].partition(" ")[0])/60.0
                     job_status = [
                         linesp[0], # jobid
                         reason_or_status, # status
                         linesp[9], # slots
-                        float(linesp[8].split(" ")[0])/60.0, # time
+                        run_time, # time
                         linesp[10].replace("bytes", "") # mem
                     ]
                 except Exception as e:
                     print("Error parsing job status")
                     print(e)
                     job_status = [linesp[0], "NA", "NA", "NA"]
-            # if line.startswith("jobnumber") or line.startswith("job_number"):
-            #     if job_status:
-            #         info.append(job_status)
-            #     job_status=[line.rstrip().split()[-1],"NA","NA","NA","NA"]
-            # # get the states for completed jobs
-            # elif line.startswith("failed"):
-            #     failed_code = line.rstrip().split()[1]
-            #     if failed_code != "0":
-            #         if failed_code in ["37","100"]:
-            #             job_status[1]=self.job_code_terminated
-            #         else:
-            #             job_status[1]=self.job_code_error
-            # elif line.startswith("deleted_by"):
-            #     if line.rstrip().split()[-1] != "NONE" and job_status[1] == self.job_code_terminated:
-            #         job_status[1]=self.job_code_deleted
-            # elif line.startswith("exit_status"):
-            #     # only record if status has not yet been set
-            #     if job_status[1] == "NA":
-            #         exit_status = line.rstrip().split()[-1]
-            #         if exit_status == "0":
-            #             job_status[1]=self.job_code_completed
-            #         elif exit_status == "137":
-            #             job_status[1]=self.job_code_terminated
-            #         else:
-            #             job_status[1]=self.job_code_error
-            # # get the current state for running jobs
-            # elif line.startswith("job_state"):
-            #     job_status[1]=line.rstrip().split()[-1]
-            # elif line.startswith("slots"):
-            #     job_status[2]=line.rstrip().split()[-1]
-            # elif line.startswith("ru_wallclock"):
-            #     try:
-            #         # get the elapsed time in minutes
-            #         job_status[3]=str(float(line.rstrip().split()[-1])/60.0)
-            #     except ValueError:
-            #         job_status[3]="NA"
-            # elif line.startswith("ru_maxrss"):
-            #     job_status[4]=line.rstrip().split()[-1]+"K"
-
-            if job_status:
                 info.append(job_status)
 
         return info
@@ -80,14 +80,17 @@ class SGEQueue(GridQueue):
         
         self.options=options
         self.environment=environment
+
+        # the user whose jobs are listed, looked up once
+        self.user=getpass.getuser()
         
         self.job_code_completed="COMPLETED"
         self.job_code_error="FAILED"
         self.job_code_terminated="TERMINATED"
         self.job_code_deleted="DELETED"
        
-        self.all_failed_codes=[self.job_code_error,self.job_code_terminated,self.job_code_deleted]
-        self.all_stopped_codes=[self.job_code_completed]+self.all_failed_codes
+        self.all_failed_codes=frozenset([self.job_code_error,self.job_code_terminated,self.job_code_deleted])
+        self.all_stopped_codes=self.all_failed_codes.union([self.job_code_completed])
        
         # allow for jobs to be terminated when about to reach the memory requested
         self.memory_buffer = 1024
@@ -117,11 +120,11 @@ class SGEQueue(GridQueue):
     
     def job_failed(self,status):
         # check if the job has a status that it failed
-        return True if status in self.all_failed_codes else False
+        return status in self.all_failed_codes
         
     def job_stopped(self,status):
         # check if the job has a status which indicates it stopped running
-        return True if status in self.all_stopped_codes else False
+        return status in self.all_stopped_codes
     
     def job_memkill(self, status, jobid, memory):
         # check if the job was killed because it used too much memory
@@ -132,7 +135,7 @@ class SGEQueue(GridQueue):
             new_status, cpus, new_time, new_memory = self.get_benchmark(jobid, wait=True)
         
         try:
-            exceed_allocation = True if (float(new_memory) + self.memory_buffer) > float(memory) else False
+            exceed_allocation = True if (float(new_memory) + self.memory_buffer) > memory else False
         except ValueError:
             exceed_allocation = False
             
@@ -147,7 +150,7 @@ class SGEQueue(GridQueue):
             new_status, cpus, new_time, new_memory = self.get_benchmark(jobid, wait=True)
         
         try:
-            exceed_allocation = True if float(new_time) > float(time) else False
+            exceed_allocation = True if float(new_time) > time else False
         except ValueError:
             exceed_allocation = False
             
@@ -158,7 +161,7 @@ class SGEQueue(GridQueue):
         jobs in the queue and for completed jobs to benchmark """
         
         # Get the jobid and state for all jobs pending/running/completed for the current user
-        qacct_stdout=self.run_grid_command_resubmit(["qacct","-o",getpass.getuser(),"-j","*"])
+        qacct_stdout=self.run_grid_command_resubmit(["qacct","-o",self.user,"-j","*"])
         
         # info list should include jobid, state, cpus, time, and maxrss
         info=[]
@@ -1,10 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
-import re
 import sys
 import logging
-import itertools
-import time
 
 import six
 
@@ -80,8 +77,9 @@ class SlurmGridWorker(GridWorker):
     def run_task_function(cls, task, extra):
         (perf, tmpdir, grid_queue, reporter) = extra
 
-        # create a script to run the python function
-        pickle_script = picklerunner.PickleScript(task, tmpdir, "task_"+str(task.task_no), grid_queue.scratch, grid_queue.output_dir)
+        # create a script to run the python function, in the folder for the task files
+        pickle_script = picklerunner.PickleScript(task, grid_queue.get_task_folder(tmpdir, task.task_no),
+            "task_"+str(task.task_no), grid_queue.scratch, grid_queue.output_dir)
         pickle_task = pickle_script.create_task()
 
         # run the task as a command
@@ -132,10 +130,10 @@ class SlurmGridWorker(GridWorker):
         return commands
 
     @classmethod
-    def submit_grid_job(cls, cores, time, memory, partition, tmpdir, commands, task, grid_queue, reporter, docker_image):
+    def submit_grid_job(cls, cores, time, memory, partition, tmpdir, commands, task, grid_queue, reporter, docker_image, mem_per_core):
 
         # evaluate the time/memory requests for the job
-        time, memory = cls.evaluate_resource_requests(time, memory)
+        time, memory = cls.evaluate_resource_requests(time, memory, cores, mem_per_core)
 
         # get the partition for the task
         current_partition = grid_queue.get_partition(time, partition)
@@ -184,8 +182,8 @@ class SLURMQueue(GridQueue):
         self.job_code_timeout="TIMEOUT"
         self.job_code_memkill="OUT_OF_MEMORY"
        
-        self.all_failed_codes=[self.job_code_failed,self.job_code_timeout,self.job_code_memkill,self.job_code_cancelled]
-        self.all_stopped_codes=[self.job_code_completed]+self.all_failed_codes
+        self.all_failed_codes=frozenset([self.job_code_failed,self.job_code_timeout,self.job_code_memkill,self.job_code_cancelled])
+        self.all_stopped_codes=self.all_failed_codes.union([self.job_code_completed])
     
     @staticmethod
     def submit_command(grid_script):    
@@ -214,12 +212,12 @@ class SLURMQueue(GridQueue):
     def job_failed(self,status):
         # check if the job has a status that it failed
         # This will capture "CANCELLED by 0" and the short form "CANCELLED+"
-        return True if status.startswith(self.job_code_cancelled) or status in self.all_failed_codes else False
+        return status in self.all_failed_codes or status.startswith(self.job_code_cancelled)
         
     def job_stopped(self,status):
         # check if the job has a status which indicates it stopped running
         # This will capture "CANCELLED by 0" and the short form "CANCELLED+"
-        return True if status.startswith(self.job_code_cancelled) or status in self.all_stopped_codes else False
+        return status in self.all_stopped_codes or status.startswith(self.job_code_cancelled)
         
     def job_memkill(self, status, jobid, memory):
         return True if status == self.job_code_memkill else False
@@ -236,12 +234,12 @@ class SLURMQueue(GridQueue):
                 
         if slurm_errors:
             # check for time or memory
-            if list(filter(lambda x: "TIME LIMIT" in x and self.job_code_cancelled in x, slurm_errors)):
+            if any("TIME LIMIT" in x and self.job_code_cancelled in x for x in slurm_errors):
                 logging.info("Slurm task %s cancelled due to time limit", grid_jobid)
                 # This has the slurm status of "TIMEOUT" from slurm sacct
                 grid_job_status=self.job_code_timeout
-            elif list(filter(lambda x: "out-of-memory handler" in x and "oom-kill event" in x, slurm_errors)) or \
-                all([i in "\n".join(slurm_errors).lower() for i in ["memory","killed"]]):
+            elif any("out-of-memory handler" in x and "oom-kill event" in x for x in slurm_errors) or \
+                all(any(i in x.lower() for x in slurm_errors) for i in ["memory","killed"]):
                 logging.info("Slurm task %s cancelled due to memory limit", grid_jobid)
                 # This has the slurm status of "CANCELLED by 0" from slurm sacct (short form is "CANCELLED+")
                 # It might also have the slurm status of FAILED
@@ -53,6 +53,21 @@ class BaseReporter(object):
 
         raise NotImplementedError()
 
+    def tasks_skipped(self, task_nos):
+        """Executed once with all of the tasks that anadama determines
+        needn't be run. By default, this calls
+        :meth:`anadama2.reporters.BaseReporter.task_skipped` for each
+        task. Override this to report skipped tasks in bulk.
+
+        :param task_nos: The task numbers of the skipped tasks.
+
+        :type task_nos: list of int
+
+        """
+
+        for task_no in task_nos:
+            self.task_skipped(task_no)
+
     def task_started(self, task_no):
         """Executed when anadama is just about to execute a task. These tasks
         are in the queue and waiting for available resources.
@@ -191,6 +206,11 @@ class ReporterGroup(BaseReporter):
             r.task_skipped(task_no)
 
 
+    def tasks_skipped(self, task_nos):
+        for r in self.reps:
+            r.tasks_skipped(task_nos)
+
+
     def task_started(self, task_no):
         for r in self.reps:
             r.task_started(task_no)
@@ -382,6 +402,10 @@ class VerboseConsoleReporter(BaseReporter):
         # Set the max length for the total output line
         self.max_length=120
 
+        # messages are collected here instead of written while
+        # reporting a batch of tasks
+        self._pending = None
+
     def _msg(self, status, task_name, description, id, visible=True, grid_update=None):
         # create a date/time string
         s = time.strftime("(%b %d %H:%M:%S) ", time.localtime())
@@ -401,7 +425,10 @@ class VerboseConsoleReporter(BaseReporter):
         
         # only write if the task is visible
         if visible is True:
-            sys.stdout.write(s)
+            if self._pending is not None:
+                self._pending.append(s)
+            else:
+                sys.stdout.write(s)
             
     def _increment_complete(self, task_no):
         # update the number of completed visible tasks
@@ -429,6 +456,16 @@ class VerboseConsoleReporter(BaseReporter):
                   self.run_context.tasks[task_no].description, task_no,
                   visible=self.run_context.tasks[task_no].visible)
 
+    def tasks_skipped(self, task_nos):
+        # write the messages for all skipped tasks at once
+        self._pending = []
+        try:
+            super(VerboseConsoleReporter, self).tasks_skipped(task_nos)
+            if self._pending:
+                sys.stdout.write("".join(self._pending))
+        finally:
+            self._pending = None
+
     def task_failed(self, task_result):
         self._increment_complete(task_result.task_no)
         if task_result.task_no is None:
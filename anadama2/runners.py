@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
+import sys
 import time
 import logging
 import itertools
@@ -90,20 +91,21 @@ class DryRunner(BaseRunner):
                 pass
                 
             tasks_by_number[number]=self.ctx.tasks[index]
-        # print the tasks from first to last
+        # build the listing for all tasks from first to last and
+        # write it to stdout at once
+        lines=[]
         for number, task in sorted(tasks_by_number.items()):
-            six.print_("{} - {}".format(number, task.name))
-            six.print_("  Dependencies ({})".format(len(task.depends)))
-            for dep in task.depends:
-                six.print_(self._depformat(dep))
-            six.print_("  Targets ({})".format(len(task.targets)))
-            for dep in task.targets:
-                six.print_(self._depformat(dep))
-            six.print_("  Actions ({})".format(len(task.actions)))
-            for action in task.actions:
-                six.print_(self._actionformat(action))
-                    
-            six.print_("------------------")
+            lines.append("{} - {}".format(number, task.name))
+            lines.append("  Dependencies ({})".format(len(task.depends)))
+            lines.extend(self._depformat(dep) for dep in task.depends)
+            lines.append("  Targets ({})".format(len(task.targets)))
+            lines.extend(self._depformat(dep) for dep in task.targets)
+            lines.append("  Actions ({})".format(len(task.actions)))
+            lines.extend(self._actionformat(action) for action in task.actions)
+            lines.append("------------------")
+        if lines:
+            sys.stdout.write("\n".join(lines)+"\n")
+            sys.stdout.flush()
 
 
     def _depformat(self, d):
@@ -130,11 +132,10 @@ class SerialLocalRunner(BaseRunner):
         while task_idx_deque:
             idx = task_idx_deque.pop()
 
-            parents = set(self.ctx.dag.predecessors(idx))
-            failed_parents = parents.intersection(self.ctx.failed_tasks)
-            if failed_parents:
+            failed_parent = _failed_parent(self.ctx, idx)
+            if failed_parent is not None:
                 self.ctx._handle_task_result(
-                    parent_failed_result(idx, next(iter(failed_parents))))
+                    parent_failed_result(idx, failed_parent))
                 continue
 
             self.ctx._handle_task_started(idx)
@@ -303,14 +304,13 @@ class ParallelLocalRunner(BaseRunner):
         logger.debug("Filling work_q")
         for _ in range(len(self.task_idx_deque)):
             idx = self.task_idx_deque.pop()
-            parents = set(self.ctx.dag.predecessors(idx))
-            failed_parents = parents.intersection(self.ctx.failed_tasks)
-            if failed_parents:
+            failed_parent = _failed_parent(self.ctx, idx)
+            if failed_parent is not None:
                 self.ctx._handle_task_result(
-                    parent_failed_result(idx, failed_parents.pop()))
+                    parent_failed_result(idx, failed_parent))
                 self.n_to_do -= 1
                 continue
-            elif parents.difference(self.ctx.completed_tasks):
+            elif _has_undone_parents(self.ctx, idx):
                 # has undone parents, come back again later
                 self.task_idx_deque.appendleft(idx)
                 continue
@@ -493,15 +493,14 @@ class GridRunner(BaseRunner):
 
     def _get_next_task(self):
         idx = self.task_idx_deque.pop()
-        parents = set(self.ctx.dag.predecessors(idx))
-        failed_parents = parents.intersection(self.ctx.failed_tasks)
-        if failed_parents:
+        failed_parent = _failed_parent(self.ctx, idx)
+        if failed_parent is not None:
             self.ctx._handle_task_result(
-                parent_failed_result(idx, next(iter(failed_parents)))
+                parent_failed_result(idx, failed_parent)
                 )
             self.n_to_do -= 1
             return None
-        elif parents.difference(self.ctx.completed_tasks):
+        elif _has_undone_parents(self.ctx, idx):
             # has undone parents, come back again later
             self.task_idx_deque.appendleft(idx)
             return None
@@ -573,3 +572,17 @@ def parent_failed_result(idx, parent_idx):
         None, None)
 
 
+def _failed_parent(run_context, idx):
+    """Return the first parent of task ``idx`` that failed, or None"""
+    failed = run_context.failed_tasks
+    for parent_idx in run_context.dag.predecessors(idx):
+        if parent_idx in failed:
+            return parent_idx
+    return None
+
+
+def _has_undone_parents(run_context, idx):
+    """Return True if any parent of task ``idx`` has not completed"""
+    completed = run_context.completed_tasks
+    return not all(parent_idx in completed
+                   for parent_idx in run_context.dag.predecessors(idx))
@@ -16,6 +16,7 @@ from .util import istask, Directory
 
 logger = logging.getLogger(__name__)
 _singleton_idx = defaultdict(dict)
+_autostring_cache = dict()
 first = itemgetter(0)
 
 def auto(x):
@@ -61,13 +62,21 @@ def auto(x):
 
 
 def _autostring(s):
+    dep = _autostring_cache.get(s)
+    if dep is not None:
+        return dep
     if s.startswith("s3:/"):
         return AWSHugeTrackedFile(s)
-    s = os.path.expanduser(os.path.expandvars(s))
-    if s.endswith('/'):
-        return TrackedDirectory(s)
+    expanded = os.path.expanduser(os.path.expandvars(s))
+    if expanded.endswith('/'):
+        dep = TrackedDirectory(expanded)
     else:
-        return HugeTrackedFile(s)
+        dep = HugeTrackedFile(expanded)
+    # absolute paths without variables or tildes always resolve to the
+    # same dependency, so skip expanding and normalizing them next time
+    if os.path.isabs(s) and "$" not in s and "~" not in s:
+        _autostring_cache[s] = dep
+    return dep
 
 
 def any_different(ds, backend):
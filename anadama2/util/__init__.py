@@ -399,7 +399,7 @@ def keepkeys(d, keys):
     :type keys: iterable
     """
 
-    ks = set(list(keys))
+    ks = keys if isinstance(keys, (set, frozenset)) else set(keys)
     to_rm = [k for k in d.keys() if k not in ks]
     for k in to_rm:
         del d[k]
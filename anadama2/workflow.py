@@ -4,18 +4,14 @@ import sys
 import re
 import shlex
 import fnmatch
+import difflib
 import logging
 import itertools
-from operator import attrgetter, itemgetter
-from collections import deque, defaultdict
+from collections import deque
 import copy
 import subprocess
 import tempfile
-
-import six
-from six.moves import filter, map
-import networkx as nx
-from networkx.algorithms.traversal.depth_first_search import dfs_edges
+import time
 
 from . import Task
 from . import tracked
@@ -25,8 +21,9 @@ from . import backends
 from . import runners
 from .cli import Configuration
 from .taskcontainer import TaskContainer
+from .dag import DAG
 from .helpers import format_command, build_actions
-from .util import matcher, noop, find_on_path
+from .util import noop, find_on_path
 from .util import istask, sugar_list, dichotomize
 from .util import keepkeys
 from .util import fname
@@ -36,7 +33,11 @@ from .grid.sge import SGE
 from .grid.aws import AWS
 from .document import PweaveDocument
 
-second = itemgetter(1)
+# matches the [t:target], [d:depend] and [v:variable] markup in do()
+_markup_regex = re.compile(r'\[([vdt]+):([^][]+)\]')
+_glob_regex = re.compile(r'[?*\[]')
+_import_keys = frozenset(("actions", "depends", "targets",
+                          "name", "interpret_deps_and_targs"))
 logger = logging.getLogger(__name__)
 
 
@@ -86,13 +87,21 @@ class Workflow(object):
     :type: document: instance of any :class: `anadama2.Document' class or None.
     """
 
+    #: Dependency states of finished tasks are written to the storage
+    #: backend in batches of this many tasks. The default saves after
+    #: every task, so a killed run can resume from all finished tasks
+    save_batch_size = 1
+
+    #: When batching saves, also write any unsaved dependency states
+    #: once this many seconds have passed since the last save
+    save_interval = 60
 
     def __init__(self, storage_backend=None, grid=None, strict=False,
                  vars=None, version=None, description=None, remove_options=None,
                  document=None, cli=True):
         self.tmpdir = None
         self.task_counter = itertools.count()
-        self.dag = nx.DiGraph()
+        self.dag = DAG()
         #: tasks is a :class:`anadama2.taskcontainer.TaskContainer`
         #: filled with objects of type :class:`anadama2.Task`. This
         #: list is populated as new tasks are added via
@@ -123,6 +132,9 @@ class Workflow(object):
         self._backend=None
         if storage_backend:
             self._backend = storage_backend
+        self._unsaved_keys, self._unsaved_vals = [], []
+        self._unsaved_count = 0
+        self._last_save = time.time()
 
         logger.debug("Instantiated run context")
 
@@ -250,21 +262,21 @@ class Workflow(object):
             contents = []
             for page in page_iterator:
                 contents+= [i['Key'] for i in page['Contents']]
-            input_files = [tracked.s3_build_path(bucket,file) for file in filter(lambda file: not file.endswith("/"), contents)]
+            input_files = [tracked.s3_build_path(bucket,file) for file in contents if not file.endswith("/")]
         else:
             input = os.path.abspath(vars_input)
 
-            input_folder_contents = map(lambda file: os.path.join(input, file), os.listdir(input))
+            input_folder_contents = [os.path.join(input, file) for file in os.listdir(input)]
             # filter out contents to only include files
             input_files = [item for item in input_folder_contents if os.path.isfile(item)]
 
         # if extension is set, then filter files
         if extension:
-            input_files = list(filter(lambda file: file.endswith(extension), input_files))
+            input_files = [file for file in input_files if file.endswith(extension)]
 
         # if name is set, then filter files to only those with the exact name
         if name:
-            input_files = list(filter(lambda file: os.path.basename(file) == name, input_files))
+            input_files = [file for file in input_files if os.path.basename(file) == name]
 
         return input_files
 
@@ -396,15 +408,17 @@ class Workflow(object):
                 targs.append(name)
             return str(name)
 
-        sh_cmd = re.sub(r'\[([vdt]+):([^][]+)\]', _repl, cmd)
+        sh_cmd = _markup_regex.sub(_repl, cmd)
         if track_cmd:
             ns = os.path.abspath(tracked.Container.key(None))
             varname = "task_{}_command".format(len(self.tasks)+1)
             d = tracked.TrackedVariable(ns, varname, sh_cmd)
             ds.append(d)
         if track_binaries:
+            # the marked up targets and depends are already tracked, so
+            # leave them out rather than searching the PATH for each one
             to_preexist = []
-            for binary in discover_binaries(cmd):
+            for binary in discover_binaries(_markup_regex.sub("", cmd)):
                 to_preexist.append(binary)
                 ds.append(binary)
             if to_preexist:
@@ -475,7 +489,7 @@ class Workflow(object):
         targets[0]=targets[0].replace(os.pathsep+extension,extension)
 
         # remove any tasks from the depends list of archive inputs
-        archive_inputs=list(filter(lambda x: not isinstance(x,Task), depends))
+        archive_inputs=[x for x in depends if not isinstance(x,Task)]
 
         # if there is an output folder, change the depends to relative paths
         # so the full path is not included in the archive
@@ -624,7 +638,7 @@ class Workflow(object):
         else:
             # if any targets or depends generate temp files, create temp folder for task
             try:
-                tracked_with_temp = list(filter(lambda x: x.temp_files(), deps+targs))
+                tracked_with_temp = [x for x in deps+targs if x.temp_files()]
             except AttributeError:
                 tracked_with_temp = []
             tmpdir = os.path.join(self.get_tmpdir(),"anadama2_temp_tracked")
@@ -685,7 +699,7 @@ class Workflow(object):
 
         """
 
-        self.add_task(noop, targets=list(map(tracked.auto, depends)),
+        self.add_task(noop, targets=[tracked.auto(d) for d in depends],
                       name="Track pre-existing dependencies", visible=False)
 
 
@@ -769,7 +783,7 @@ class Workflow(object):
 
         self.completed_tasks = set()
         self.failed_tasks = set()
-        self.task_results = [None for _ in range(len(self.tasks))]
+        self.task_results = [None] * len(self.tasks)
         self._reporter = reporter or reporters.default(self.vars.get("output"),self.vars.get("log_level"))
         self._reporter.started(self)
 
@@ -781,9 +795,6 @@ class Workflow(object):
         if dry_run:
             _runner = runners.DryRunner(self)
         _runner.quit_early = quit_early
-        logger.debug("Sorting task_nos by network topology")
-        task_idxs = list(reversed(list(nx.algorithms.dag.topological_sort(self.dag))))
-        logger.debug("Sorting complete")
         keep, drop = set(), set()
         if until_task:
             for task_name_or_no in sugar_list(until_task):
@@ -799,21 +810,28 @@ class Workflow(object):
         if exclude_target:
             for name_or_pattern in sugar_list(exclude_target):
                 drop = self._targetmatch(drop, name_or_pattern, allchildren)
-        if not keep:
-            keep = set(task_idxs)
-        task_idxs = list(filter((keep-drop).__contains__, task_idxs))
+        logger.debug("Sorting task_nos by network topology")
+        if keep:
+            # only sort the part of the graph that will be run
+            task_idxs = self.dag.topological_sort(reverse=True,
+                                                  nodes=keep-drop)
+        else:
+            task_idxs = [ idx for idx in self.dag.topological_sort(reverse=True)
+                          if idx not in drop ]
+        logger.debug("Sorting complete")
         if not skip_nothing:
             task_idxs = self._filter_skipped_tasks(task_idxs)
         task_idxs = deque(task_idxs)
 
-        _runner.run_tasks(task_idxs)
+        try:
+            _runner.run_tasks(task_idxs)
+        finally:
+            self._save_results()
         self._handle_finished()
 
 
     def _import(self, task_dict):
-        keys_to_keep = ("actions", "depends", "targets",
-                        "name", "interpret_deps_and_targs")
-        return self.add_task(**keepkeys(task_dict, keys_to_keep))
+        return self.add_task(**keepkeys(task_dict, _import_keys))
 
     _ = _import
 
@@ -825,14 +843,28 @@ class Workflow(object):
             self.failed_tasks.add(result.task_no)
             self._reporter.task_failed(result)
         else:
-            self._backend.save(result.dep_keys, result.dep_compares)
+            self._unsaved_keys.extend(result.dep_keys)
+            self._unsaved_vals.extend(result.dep_compares)
             self.completed_tasks.add(result.task_no)
             self._reporter.task_completed(result)
             pxdeps = [ d for d in self.tasks[result.task_no].depends
                        if not istask(d) and d not in self._depidx ]
             if pxdeps:
-                self._backend.save([d.name for d in pxdeps],
-                                   [list(d.compare()) for d in pxdeps])
+                self._unsaved_keys.extend(d.name for d in pxdeps)
+                self._unsaved_vals.extend(list(d.compare()) for d in pxdeps)
+            self._unsaved_count += 1
+            if self._unsaved_count >= self.save_batch_size or \
+                    time.time() - self._last_save >= self.save_interval:
+                self._save_results()
+
+
+    def _save_results(self):
+        # write the saved up dependency states in one backend call
+        if self._unsaved_keys:
+            self._backend.save(self._unsaved_keys, self._unsaved_vals)
+        self._unsaved_keys, self._unsaved_vals = [], []
+        self._unsaved_count = 0
+        self._last_save = time.time()
 
 
 
@@ -851,8 +883,10 @@ class Workflow(object):
                     logger.debug("Can't skip task %i because of dep change",
                                  idx)
                     should_run.add(idx)
-        while idxs:
-            idx = idxs.pop()
+        # task_idxs is in reverse topological order, so walking it
+        # backwards sees every parent before its children and one pass
+        # is enough to carry reruns down the graph
+        for idx in reversed(idxs):
             if idx in should_run:
                 continue
             for parent_idx in self.dag.predecessors(idx):
@@ -861,10 +895,11 @@ class Workflow(object):
                     logger.debug("Can't skip %i because it depends "
                                  "on task %i, which will be rerun",
                                  idx, parent_idx)
+                    break
 
         to_run, skipped = dichotomize(task_idxs, should_run.__contains__)
-        for idx in skipped:
-            self._handle_task_skipped(idx)
+        if skipped:
+            self._handle_tasks_skipped(skipped)
         return to_run
 
 
@@ -878,50 +913,63 @@ class Workflow(object):
 
 
     def _aggregate_deps(self, idxs):
-        grp = defaultdict(set)
+        # tracked objects are singletons, so group them by identity
+        # rather than through their python-level __hash__
+        grp = dict()
+        tasks = self.tasks
         for idx in idxs:
-            task = self.tasks[idx]
+            task = tasks[idx]
             for dep in itertools.chain(task.depends, task.targets):
                 if istask(dep):
                     continue
-                grp[dep].add(idx)
+                key = id(dep)
+                if key in grp:
+                    grp[key][1].add(idx)
+                else:
+                    grp[key] = (dep, set([idx]))
 
-        return six.iteritems(grp)
+        return grp.values()
 
 
     def _handle_task_started(self, task_no):
         self._reporter.task_started(task_no)
 
 
-    def _handle_task_skipped(self, task_no):
-        self.completed_tasks.add(task_no)
-        self._reporter.task_skipped(task_no)
+    def _handle_tasks_skipped(self, task_nos):
+        self.completed_tasks.update(task_nos)
+        self._reporter.tasks_skipped(task_nos)
+
 
     def _add_task(self, task):
         """Actually add a task to the internal dependency data structure"""
 
         self.tasks.append(task)
         self.dag.add_node(task.task_no)
+        # sort the dependencies first so that a missing dependency is
+        # reported before anything else is added to the workflow
+        parent_tasks, indexed, preexisting = [], [], []
         for dep in task.depends:
             if istask(dep):
-                self.dag.add_edge(dep.task_no, task.task_no)
-                continue
-            if dep in self._depidx:
-                pass
+                parent_tasks.append(dep)
+            elif dep in self._depidx:
+                indexed.append(dep)
             elif dep.must_preexist == False:
                 continue
             elif not self.strict and dep.exists():
-                self.already_exists(dep)
-            try:
-                parent_task = self._depidx[dep]
-            except KeyError:
-                self._handle_nosuchdep(dep, task)
+                preexisting.append(dep)
             else:
-                # check to see if the dependency exists but doesn't
-                # link to a task. This would happen if someone defined
-                # a preexisting dependency
-                if parent_task is not None:
-                    self.dag.add_edge(parent_task.task_no, task.task_no)
+                self._handle_nosuchdep(dep, task)
+        for dep in parent_tasks:
+            self.dag.add_edge(dep.task_no, task.task_no)
+        if preexisting:
+            self.already_exists(*preexisting)
+        for dep in itertools.chain(indexed, preexisting):
+            parent_task = self._depidx[dep]
+            # check to see if the dependency exists but doesn't
+            # link to a task. This would happen if someone defined
+            # a preexisting dependency
+            if parent_task is not None:
+                self.dag.add_edge(parent_task.task_no, task.task_no)
         for targ in task.targets:
             # add targets to the DependencyIndex after looking up
             # dependencies for the current task. Hopefully this avoids
@@ -934,13 +982,13 @@ class Workflow(object):
         self.dag.remove_node(task.task_no)
         msg = "Unable to find dependency `{}' of type `{}'. "
         msg = msg.format(str(dep), type(dep))
-        alldeps = itertools.chain.from_iterable(
-            [list(t.depends) + list(t.targets) for t in self.tasks]
-        )
-        try:
-            closest = matcher.find_match(dep, alldeps, key=attrgetter("name"))
-        except:
+        alldeps = ( d for t in self.tasks
+                    for d in itertools.chain(t.depends, t.targets) )
+        names = dict( (d.name, d) for d in alldeps if not istask(d) )
+        closest = difflib.get_close_matches(dep.name, list(names), n=1)
+        if not closest:
             raise KeyError(msg)
+        closest = names[closest[0]]
         msg += "Perhaps you meant `{}' of type `{}'?"
         raise KeyError(msg.format(str(closest), type(closest)))
 
@@ -955,7 +1003,7 @@ class Workflow(object):
         if try_cwd:
             name_or_pattern=os.path.join(os.getcwd(), name_or_pattern)
 
-        if re.search(r'[?*\[]', name_or_pattern):
+        if _glob_regex.search(name_or_pattern):
             regex = re.compile(fnmatch.translate(name_or_pattern))
             matches = [ no for name, no in self._alltargets
                         if regex.match(name) ]
@@ -996,14 +1044,14 @@ class Workflow(object):
         return taskset
 
 def _build_depends(depends):
-    depends = filter(None, sugar_list(depends))
-    return list(map(tracked.auto, depends))
+    return [tracked.auto(d) for d in sugar_list(depends) if d]
 
 
 def _build_targets(targets):
-    targets = filter(None, sugar_list(targets))
     ret = list()
-    for targ in targets:
+    for targ in sugar_list(targets):
+        if not targ:
+            continue
         if istask(targ):
             raise ValueError("Can't make a task a target")
         ret.append(tracked.auto(targ))
@@ -1022,7 +1070,12 @@ def discover_binaries(s):
     """
 
     ds = list()
+    seen = set()
     for term in shlex.split(s):
+        if term in seen or term.startswith("-"):
+            # already checked or a command line option
+            continue
+        seen.add(term)
         if not os.path.exists(term):
             term = find_on_path(term)
         if not term:
@@ -1033,28 +1086,31 @@ def discover_binaries(s):
         if not os.access(term, os.F_OK | os.X_OK):
             # doesn't exist or can't execute
             continue
+        if os.stat(term).st_size >= 1<<20:
+            continue
         try:
             dep = tracked.TrackedExecutable(term)
         except ValueError:
             continue
-        if os.stat(dep.name).st_size < 1<<20:
-            ds.append(dep)
+        ds.append(dep)
 
     return ds
 
 
 def allchildren(dag, task_no):
-    kids = map(second, dfs_edges(dag, task_no))
-    return itertools.chain([task_no], kids)
+    return _reachable(dag.successors, task_no)
 
 
 def allparents(dag, task_no):
-    seen = set()
-    to_check = deque([task_no])
+    return _reachable(dag.predecessors, task_no)
+
+
+def _reachable(neighbors, task_no):
+    seen = set([task_no])
+    to_check = [task_no]
     while to_check:
-        idx = to_check.popleft()
-        if idx in seen:
-            continue
-        seen.add(idx)
-        to_check.extend(dag.predecessors(idx))
+        for idx in neighbors(to_check.pop()):
+            if idx not in seen:
+                seen.add(idx)
+                to_check.append(idx)
     return seen
@@ -101,6 +101,7 @@ setup(
         ]
     },
     install_requires=requires,
+    tests_require=["networkx"],
     test_suite="tests.test_suite",
     cmdclass={ 'sphinx_build' : SphinxBuild }
 )
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import shutil
+import tempfile
 import unittest
 import optparse
 
@@ -11,9 +12,7 @@ import anadama2.util
 class TestCli(unittest.TestCase):
 
     def setUp(self):
-        self.workdir = "/tmp/anadama_testdir"
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
 
     def tearDown(self):
         if os.path.isdir(self.workdir):
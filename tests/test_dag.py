@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import anadama2.dag
+
+
+class TestDAG(unittest.TestCase):
+
+    def setUp(self):
+        self.dag = anadama2.dag.DAG()
+        for n in range(4):
+            self.dag.add_node(n)
+        self.dag.add_edge(0, 1)
+        self.dag.add_edge(0, 2)
+        self.dag.add_edge(1, 3)
+        self.dag.add_edge(2, 3)
+
+
+    def test_adjacency(self):
+        self.assertEqual(self.dag.nodes(), [0, 1, 2, 3])
+        self.assertEqual(self.dag.successors(0), [1, 2])
+        self.assertEqual(self.dag.predecessors(3), [1, 2])
+        self.assertEqual(self.dag.predecessors(0), [])
+
+
+    def test_add_edge_twice(self):
+        self.dag.add_edge(0, 1)
+        self.assertEqual(self.dag.successors(0), [1, 2])
+        self.assertEqual(self.dag.predecessors(1), [0])
+
+
+    def test_add_edge_adds_nodes(self):
+        self.dag.add_edge(3, 4)
+        self.assertIn(4, self.dag)
+        self.assertEqual(len(self.dag), 5)
+
+
+    def test_remove_node(self):
+        self.dag.remove_node(1)
+        self.assertNotIn(1, self.dag)
+        self.assertEqual(self.dag.successors(0), [2])
+        self.assertEqual(self.dag.predecessors(3), [2])
+        self.dag.add_edge(0, 1)
+        self.assertEqual(self.dag.predecessors(1), [0])
+
+
+    def test_topological_sort(self):
+        order = self.dag.topological_sort()
+        self.assertEqual(sorted(order), [0, 1, 2, 3])
+        pos = dict( (n, i) for i, n in enumerate(order) )
+        for u in self.dag.nodes():
+            for v in self.dag.successors(u):
+                self.assertLess(pos[u], pos[v])
+
+
+    def test_topological_sort_reverse(self):
+        order = self.dag.topological_sort(reverse=True)
+        self.assertEqual(sorted(order), [0, 1, 2, 3])
+        pos = dict( (n, i) for i, n in enumerate(order) )
+        for u in self.dag.nodes():
+            for v in self.dag.successors(u):
+                self.assertGreater(pos[u], pos[v])
+
+
+    def test_topological_sort_subgraph(self):
+        order = self.dag.topological_sort(nodes=set([0, 2, 3]))
+        self.assertEqual(order, [0, 2, 3])
+        order = self.dag.topological_sort(reverse=True, nodes=set([1, 3]))
+        self.assertEqual(order, [3, 1])
+
+
+    def test_topological_sort_cycle(self):
+        self.dag.add_edge(3, 0)
+        with self.assertRaises(ValueError):
+            self.dag.topological_sort()
+
+
+
+if __name__ == "__main__":
+    unittest.main()
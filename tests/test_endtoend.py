@@ -2,38 +2,41 @@
 import os
 import random
 import shutil
+import tempfile
 import unittest
 from collections import defaultdict
 
 import six
 from six import StringIO
 import networkx as nx
-from networkx.algorithms.traversal.depth_first_search import dfs_edges
 
 import anadama2
 import anadama2.workflow
 import anadama2.backends
+import anadama2.util
 from anadama2.util import capture
     
 def bern(p):
     return random.random() < p
 
+def fail(task):
+    raise ValueError("should fail")
+
 class TestEndToEnd(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        os.environ[anadama2.backends.ENV_VAR] = "/tmp/anadamatest"
+        cls.db_dir = tempfile.mkdtemp(prefix="anadamatest_")
+        os.environ[anadama2.backends.ENV_VAR] = cls.db_dir
     
     @classmethod
     def tearDownClass(cls):
-        if os.path.isdir("/tmp/anadamatest"):
-            shutil.rmtree("/tmp/anadamatest")
+        if os.path.isdir(cls.db_dir):
+            shutil.rmtree(cls.db_dir)
 
 
     def setUp(self):
-        self.workdir = "/tmp/anadama_testdir"
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
         cfg = anadama2.cli.Configuration(prompt_user=False)
         cfg._arguments["output"].keywords["default"]=self.workdir
         self.ctx = anadama2.workflow.Workflow(vars=cfg)
@@ -53,26 +56,29 @@ class TestEndToEnd(unittest.TestCase):
         G = nx.gn_graph(20)
         targets = defaultdict(dict)
         depends = defaultdict(dict)
-        shall_fail = set([ random.choice(G.nodes())
+        shall_fail = set([ random.choice(list(G.nodes()))
                            for _ in range(int(len(G)**.5)) ])
-        nodes = nx.algorithms.dag.topological_sort(G)
+        nodes = list(nx.algorithms.dag.topological_sort(G))
         task_nos = [None for _ in range(len(nodes))]
+        pred = dict( (n, list(G.predecessors(n))) for n in nodes )
+        tasks = self.ctx.tasks
         for n in nodes:
-            cmd = "touch /dev/null "
+            # only the dependency and failure handling is under test, so
+            # use python actions instead of starting a shell for each task
+            action = anadama2.util.noop
             name = None
             if n in shall_fail:
-                cmd += " ;exit 1"
+                action = fail
                 name = "should fail"
             t = self.ctx.add_task(
-                cmd, name=name,
-                depends=[self.ctx.tasks[task_nos[a]] for a in G.predecessors(n)]
+                action, name=name,
+                depends=[tasks[task_nos[a]] for a in pred[n]]
             )
             task_nos[n] = t.task_no
 
         with capture(stderr=StringIO()):
             with self.assertRaises(anadama2.workflow.RunFailed):
                 self.ctx.go()
-        child_fail = set()
         for n in shall_fail:
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.failed_tasks,
@@ -80,14 +86,14 @@ class TestEndToEnd(unittest.TestCase):
                            " as failed"))
             self.assertTrue(bool(self.ctx.task_results[task_no].error),
                             "Failed tasks should have errors in task_results")
-            for _, succ in dfs_edges(G, n):
-                s_no = task_nos[succ]
-                child_fail.add(succ)
-                self.assertIn(s_no, self.ctx.failed_tasks,
-                              "all children of failed tasks should fail")
-                self.assertIn("parent task", self.ctx.task_results[s_no].error,
-                              ("children of failed tasks should have errors"
-                               " in task_results"))
+        child_fail = set().union(*(nx.descendants(G, n) for n in shall_fail))
+        for succ in child_fail:
+            s_no = task_nos[succ]
+            self.assertIn(s_no, self.ctx.failed_tasks,
+                          "all children of failed tasks should fail")
+            self.assertIn("parent task", self.ctx.task_results[s_no].error,
+                          ("children of failed tasks should have errors"
+                           " in task_results"))
         for n in set(nodes).difference(shall_fail.union(child_fail)):
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.completed_tasks)
@@ -104,9 +110,9 @@ class TestEndToEnd(unittest.TestCase):
             f = os.path.join(self.workdir, "{}_{}.txt".format(a,b))
             allfiles.append(f)
             targets[a][b] = depends[b][a] = f
-        shall_fail = set([ random.choice(G.nodes())
+        shall_fail = set([ random.choice(list(G.nodes()))
                            for _ in range(int(len(G)**.5)) ])
-        nodes = nx.algorithms.dag.topological_sort(G)
+        nodes = list(nx.algorithms.dag.topological_sort(G))
         task_nos = [None for _ in range(len(nodes))]
         for n in nodes:
             cmd = "touch /dev/null "+ " ".join(targets[n].values())
@@ -123,7 +129,6 @@ class TestEndToEnd(unittest.TestCase):
             with self.assertRaises(anadama2.workflow.RunFailed):
                 rep = anadama2.reporters.LoggerReporter("debug", "/tmp/analog")
                 self.ctx.go(reporter=rep)
-        child_fail = set()
         for n in shall_fail:
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.failed_tasks,
@@ -131,14 +136,14 @@ class TestEndToEnd(unittest.TestCase):
                            " as failed"))
             self.assertTrue(bool(self.ctx.task_results[task_no].error),
                             "Failed tasks should have errors in task_results")
-            for _, succ in dfs_edges(G, n):
-                s_no = task_nos[succ]
-                child_fail.add(succ)
-                self.assertIn(s_no, self.ctx.failed_tasks,
-                              "all children of failed tasks should fail")
-                self.assertIn("parent task", self.ctx.task_results[s_no].error,
-                              ("children of failed tasks should have errors"
-                               " in task_results"))
+        child_fail = set().union(*(nx.descendants(G, n) for n in shall_fail))
+        for succ in child_fail:
+            s_no = task_nos[succ]
+            self.assertIn(s_no, self.ctx.failed_tasks,
+                          "all children of failed tasks should fail")
+            self.assertIn("parent task", self.ctx.task_results[s_no].error,
+                          ("children of failed tasks should have errors"
+                           " in task_results"))
         for n in set(nodes).difference(shall_fail.union(child_fail)):
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.completed_tasks)
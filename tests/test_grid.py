@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import anadama2
+import anadama2.runners
+import anadama2.grid.grid
+
+
+class FakeTime(object):
+    """Stands in for the time module so queue refreshes and waits run instantly"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeQueue(anadama2.grid.grid.GridQueue):
+
+    def __init__(self):
+        super(FakeQueue, self).__init__("test")
+        self.queue_status = []
+        self.refreshes = 0
+
+    def submit_template(self):
+        return []
+
+    def job_failed(self, status):
+        return status == "FAILED"
+
+    def job_stopped(self, status):
+        return status in ("DONE", "FAILED")
+
+    def refresh_queue_status(self):
+        self.refreshes += 1
+        return [list(stats) for stats in self.queue_status]
+
+
+class TestGridQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.real_time = anadama2.grid.grid.time
+        anadama2.grid.grid.time = FakeTime()
+        self.queue = FakeQueue()
+
+
+    def tearDown(self):
+        anadama2.grid.grid.time = self.real_time
+
+
+    def test_get_all_stats_for_jobid(self):
+        self.queue.queue_status = [["123", "RUNNING", "1", "5", "10"],
+                                   ["12", "DONE", "1", "8", "30"]]
+        self.assertEqual(self.queue.get_all_stats_for_jobid("12"),
+                         [["12", "DONE", "1", "8", "30"]])
+        self.assertEqual(self.queue.get_job_status("123"), "RUNNING")
+
+
+    def test_get_all_stats_for_jobid_no_prefix_match(self):
+        self.queue.queue_status = [["123", "RUNNING", "1", "5", "10"]]
+        self.assertEqual(self.queue.get_all_stats_for_jobid("12"),
+                         [["12", "Pending", "NA", "NA", "NA"]])
+
+
+    def test_get_benchmark_cached_until_refresh(self):
+        self.queue.queue_status = [["1", "RUNNING", "1", "5", "10"]]
+        self.assertEqual(self.queue.get_benchmark("1"),
+                         ("RUNNING", "1", "5", "10"))
+        self.assertIn("1", self.queue.benchmarks)
+
+        # new stats are not read until the queue is refreshed
+        self.queue.queue_status = [["1", "RUNNING", "1", "6", "20"]]
+        refreshes = self.queue.refreshes
+        self.assertEqual(self.queue.get_benchmark("1")[3], "10")
+        self.assertEqual(self.queue.refreshes, refreshes)
+
+        self.queue.get_queue_status(refresh=True)
+        self.assertEqual(self.queue.get_benchmark("1")[3], "20")
+
+
+    def test_get_benchmark_cached_for_stopped_job(self):
+        self.queue.queue_status = [["1", "DONE", "1", "8", "30"]]
+        self.assertEqual(self.queue.get_benchmark("1"), ("DONE", "1", "8", "30"))
+
+        # the resubmission checks and benchmark recording reuse the stats
+        self.queue.queue_status = [["1", "DONE", "1", "9", "40"]]
+        refreshes = self.queue.refreshes
+        self.assertEqual(self.queue.get_benchmark("1"), ("DONE", "1", "8", "30"))
+        self.assertEqual(self.queue.refreshes, refreshes)
+
+        self.queue.get_queue_status(refresh=True)
+        self.assertEqual(self.queue.get_benchmark("1"), ("DONE", "1", "9", "40"))
+
+
+    def test_clear_benchmark(self):
+        self.queue.queue_status = [["1", "DONE", "1", "8", "30"]]
+        self.queue.get_benchmark("1")
+        self.assertIn("1", self.queue.benchmarks)
+        self.queue.clear_benchmark("1")
+        self.assertNotIn("1", self.queue.benchmarks)
+        # clearing a job without a saved benchmark is allowed
+        self.queue.clear_benchmark("2")
+
+
+def noop_function(task):
+    pass
+
+
+class FakeGridWorker(anadama2.grid.grid.GridWorker):
+
+    @classmethod
+    def run_task_command(cls, task, extra):
+        # write the grid files without submitting the job
+        (perf, tmpdir, grid_queue, reporter) = extra
+        grid_queue.create_grid_script("test", 1, 5, 10, "\n".join(task.actions),
+            task.task_no, tmpdir, None)
+        return anadama2.runners._get_task_result(task)
+
+
+class FakeReporter(object):
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class TestGridWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.real_time = anadama2.grid.grid.time
+        anadama2.grid.grid.time = FakeTime()
+        self.tmpdir = tempfile.mkdtemp(prefix="anadama_testdir_")
+
+
+    def tearDown(self):
+        anadama2.grid.grid.time = self.real_time
+        shutil.rmtree(self.tmpdir)
+
+
+    def test_run_task_command_clears_benchmark(self):
+        queue = FakeQueue()
+        queue.benchmark_on = True
+        queue.submit_job = lambda grid_script: "1"
+        queue.queue_status = [["1", "DONE", "1", "8", "30"]]
+        task = anadama2.Task("task", ["echo"], [], [], 1, True, ["echo"], {}, False)
+        perf = anadama2.grid.grid.GridJobRequires(5, 10, 1, "test", None)
+
+        anadama2.grid.grid.GridWorker.run_task_command(task,
+            (perf, self.tmpdir, queue, FakeReporter()))
+        # the benchmark was read and then removed once the task finished
+        self.assertEqual(queue.refreshes, 1)
+        self.assertEqual(queue.benchmarks, {})
+
+
+    def test_task_files_in_task_folders(self):
+        queue = FakeQueue()
+        for task_no in (1, 1001):
+            task = anadama2.Task("task", [noop_function], [], [], task_no,
+                                 True, [noop_function], {}, False)
+            FakeGridWorker.run_task_function(task, (None, self.tmpdir, queue, None))
+        # the temp directory only holds the folders for the task files
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ["0000", "0001"])
+        # the grid script and the pickled task, result, and runner script
+        self.assertEqual(len(os.listdir(os.path.join(self.tmpdir, "0001"))), 4)
+
+
+    def test_scalar(self):
+        self.assertEqual(anadama2.grid.grid._scalar(100), 100)
+        self.assertEqual(anadama2.grid.grid._scalar("10*6"), "10*6")
+        # the max override is not part of the requested amount
+        self.assertEqual(anadama2.grid.grid._scalar([500, 200]), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import shutil
+import tempfile
 import unittest
 
 import anadama2.helpers
@@ -9,9 +10,7 @@ import anadama2.helpers
 class TestHelpers(unittest.TestCase):
 
     def setUp(self):
-        self.workdir = "/tmp/anadama_testdir"
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
 
 
     def tearDown(self):
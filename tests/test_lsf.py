@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import anadama2.grid.lsf
+
+
+BJOBS_OUTPUT = "\n".join([
+    "\t".join(["1", "0", "DONE", "anadama_job", "-", "-", "-",
+               "Oct 15 10:00", "120 second(s)", "1", "35 Mbytes"]),
+    "\t".join(["2", "0", "EXIT", "anadama_job", "-", "-", "1",
+               "Oct 15 10:00", "60 second(s)", "1", "35 Mbytes"]),
+    "\t".join(["3", "0", "EXIT", "anadama_job", "-",
+               "TERM_MEMLIMIT: job killed after reaching LSF memory usage limit",
+               "130", "Oct 15 10:00", "60 second(s)", "1", "1 Gbytes"]),
+    "\t".join(["4", "0", "EXIT", "anadama_job", "-",
+               "TERM_RUNLIMIT: job killed after reaching LSF run time limit",
+               "140", "Oct 15 10:00", "600 second(s)", "1", "35 Mbytes"]),
+    "\t".join(["5", "0", "RUN", "other_job", "-", "-", "-",
+               "Oct 15 10:00", "60 second(s)", "1", "35 Mbytes"]),
+    "\t".join(["6", "0", "EXIT", "anadama_job", "-", "-", "137",
+               "Oct 15 10:00", "60 second(s)", "1", "3900 Mbytes"]),
+    "\t".join(["7", "0", "EXIT", "anadama_job", "-", "-", "137",
+               "Oct 15 10:00", "600 second(s)", "1", "100 Mbytes"]),
+    "\t".join(["8", "0", "EXIT", "anadama_job", "-",
+               "TERM_OWNER: job killed by owner",
+               "130", "Oct 15 10:00", "600 second(s)", "1", "3900 Mbytes"]),
+    ""])
+
+
+class FakeLSFQueue(anadama2.grid.lsf.LSFQueue):
+
+    def run_grid_command_resubmit(self, command):
+        return BJOBS_OUTPUT
+
+
+class TestLSFQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = FakeLSFQueue("test")
+
+
+    def test_refresh_queue_status(self):
+        status = dict( (stats[0], stats) for stats in self.queue.refresh_queue_status() )
+        self.assertEqual(sorted(status), ["1", "2", "3", "4", "6", "7", "8"])
+        self.assertEqual(status["1"], ["1", "DONE", "1", 2.0, "35 M"])
+        self.assertEqual(status["2"][1], "EXIT:1")
+        self.assertTrue(status["3"][1].startswith("EXIT:130:TERM_MEMLIMIT"))
+        self.assertTrue(self.queue.job_failed(status["3"][1]))
+        self.assertTrue(self.queue.job_stopped(status["3"][1]))
+        self.assertFalse(self.queue.job_failed(status["1"][1]))
+
+
+    def test_job_memkill(self):
+        # from the exit reason
+        self.assertTrue(self.queue.job_memkill("EXIT", "3", 4000))
+        self.assertFalse(self.queue.job_memkill("EXIT", "4", 1000))
+        self.assertFalse(self.queue.job_memkill("EXIT", "8", 4000))
+        # a script error on a small memory request is not a memory kill
+        self.assertFalse(self.queue.job_memkill("EXIT", "2", 1000))
+        self.assertFalse(self.queue.job_memkill("DONE", "1", 1000))
+
+
+    def test_job_memkill_without_exit_reason(self):
+        # a job killed without an exit reason, as by the OOM killer, near the memory requested
+        self.assertTrue(self.queue.job_memkill("EXIT", "6", 4000))
+        self.assertFalse(self.queue.job_memkill("EXIT", "7", 4000))
+
+
+    def test_job_timeout(self):
+        # from the exit reason
+        self.assertTrue(self.queue.job_timeout("EXIT", "4", 60))
+        self.assertFalse(self.queue.job_timeout("EXIT", "3", 0))
+        self.assertFalse(self.queue.job_timeout("EXIT", "8", 5))
+        self.assertFalse(self.queue.job_timeout("EXIT", "2", 0))
+        self.assertFalse(self.queue.job_timeout("DONE", "1", 1))
+
+
+    def test_job_timeout_without_exit_reason(self):
+        self.assertTrue(self.queue.job_timeout("EXIT", "7", 5))
+        self.assertFalse(self.queue.job_timeout("EXIT", "6", 5))
+
+
+    def test_job_killed_by_signal(self):
+        self.assertTrue(self.queue.job_killed_by_signal("EXIT:137"))
+        self.assertFalse(self.queue.job_killed_by_signal("EXIT:1"))
+        self.assertFalse(self.queue.job_killed_by_signal("DONE"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import shutil
+import tempfile
 import unittest
 
 from anadama2.reporters import LoggerReporter
@@ -9,10 +10,7 @@ class TestReporters(unittest.TestCase):
     
 
     def setUp(self):
-        self.workdir = "/tmp/anadama_testdir"
-        # create the work directory
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
         
         # create a demo log file
         self.demo_log_text="""
@@ -2,13 +2,13 @@
 import os
 import random
 import shutil
+import tempfile
 import unittest
 from collections import defaultdict
 
 import six
 from six import StringIO
 import networkx as nx
-from networkx.algorithms.traversal.depth_first_search import dfs_edges
 
 import anadama2
 import anadama2.grid.sge
@@ -29,18 +29,17 @@ class TestSGE(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        os.environ[anadama2.backends.ENV_VAR] = "/tmp/anadamatest"
+        cls.db_dir = tempfile.mkdtemp(prefix="anadamatest_")
+        os.environ[anadama2.backends.ENV_VAR] = cls.db_dir
     
     @classmethod
     def tearDownClass(cls):
-        if os.path.isdir("/tmp/anadamatest"):
-            shutil.rmtree("/tmp/anadamatest")
+        if os.path.isdir(cls.db_dir):
+            shutil.rmtree(cls.db_dir)
 
 
     def setUp(self):
-        self.workdir = "tmp/anadama_testdir"
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
         cfg = anadama2.cli.Configuration()
         cfg._arguments["output"].keywords["default"]=self.workdir
         powerup = anadama2.grid.sge.SGE(PARTITION, TMPDIR)
@@ -61,10 +60,12 @@ class TestSGE(unittest.TestCase):
         G = nx.gn_graph(20)
         targets = defaultdict(dict)
         depends = defaultdict(dict)
-        shall_fail = set([ random.choice(G.nodes())
+        shall_fail = set([ random.choice(list(G.nodes()))
                            for _ in range(int(len(G)**.5)) ])
-        nodes = nx.algorithms.dag.topological_sort(G)
+        nodes = list(nx.algorithms.dag.topological_sort(G))
         task_nos = [None for _ in range(len(nodes))]
+        pred = dict( (n, list(G.predecessors(n))) for n in nodes )
+        tasks = self.ctx.tasks
         for n in nodes:
             cmd = "touch /dev/null "
             name = None
@@ -75,14 +76,13 @@ class TestSGE(unittest.TestCase):
             add_task = self.ctx.add_task if bern(0.5) else sge_add_task
             t = add_task(
                 cmd, name=name,
-                depends=[self.ctx.tasks[task_nos[a]] for a in G.predecessors(n)]
+                depends=[tasks[task_nos[a]] for a in pred[n]]
             )
             task_nos[n] = t.task_no
 
         with capture(stderr=StringIO()):
             with self.assertRaises(anadama2.workflow.RunFailed):
                 self.ctx.go(grid_jobs=2)
-        child_fail = set()
         for n in shall_fail:
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.failed_tasks,
@@ -90,14 +90,14 @@ class TestSGE(unittest.TestCase):
                            " as failed"))
             self.assertTrue(bool(self.ctx.task_results[task_no].error),
                             "Failed tasks should have errors in task_results")
-            for _, succ in dfs_edges(G, n):
-                s_no = task_nos[succ]
-                child_fail.add(succ)
-                self.assertIn(s_no, self.ctx.failed_tasks,
-                              "all children of failed tasks should fail")
-                self.assertIn("parent task", self.ctx.task_results[s_no].error,
-                              ("children of failed tasks should have errors"
-                               " in task_results"))
+        child_fail = set().union(*(nx.descendants(G, n) for n in shall_fail))
+        for succ in child_fail:
+            s_no = task_nos[succ]
+            self.assertIn(s_no, self.ctx.failed_tasks,
+                          "all children of failed tasks should fail")
+            self.assertIn("parent task", self.ctx.task_results[s_no].error,
+                          ("children of failed tasks should have errors"
+                           " in task_results"))
         for n in set(nodes).difference(shall_fail.union(child_fail)):
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.completed_tasks)
@@ -115,9 +115,9 @@ class TestSGE(unittest.TestCase):
             f = os.path.join(self.workdir, "{}_{}.txt".format(a,b))
             allfiles.append(f)
             targets[a][b] = depends[b][a] = f
-        shall_fail = set([ random.choice(G.nodes())
+        shall_fail = set([ random.choice(list(G.nodes()))
                            for _ in range(int(len(G)**.5)) ])
-        nodes = nx.algorithms.dag.topological_sort(G)
+        nodes = list(nx.algorithms.dag.topological_sort(G))
         task_nos = [None for _ in range(len(nodes))]
         for n in nodes:
             cmd = "touch /dev/null "+ " ".join(list(targets[n].values()))
@@ -134,7 +134,6 @@ class TestSGE(unittest.TestCase):
         with capture(stderr=StringIO()):
             with self.assertRaises(anadama2.workflow.RunFailed):
                 self.ctx.go(grid_jobs=2)
-        child_fail = set()
         for n in shall_fail:
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.failed_tasks,
@@ -142,14 +141,14 @@ class TestSGE(unittest.TestCase):
                            " as failed"))
             self.assertTrue(bool(self.ctx.task_results[task_no].error),
                             "Failed tasks should have errors in task_results")
-            for _, succ in dfs_edges(G, n):
-                s_no = task_nos[succ]
-                child_fail.add(succ)
-                self.assertIn(s_no, self.ctx.failed_tasks,
-                              "all children of failed tasks should fail")
-                self.assertIn("parent task", self.ctx.task_results[s_no].error,
-                              ("children of failed tasks should have errors"
-                               " in task_results"))
+        child_fail = set().union(*(nx.descendants(G, n) for n in shall_fail))
+        for succ in child_fail:
+            s_no = task_nos[succ]
+            self.assertIn(s_no, self.ctx.failed_tasks,
+                          "all children of failed tasks should fail")
+            self.assertIn("parent task", self.ctx.task_results[s_no].error,
+                          ("children of failed tasks should have errors"
+                           " in task_results"))
         for n in set(nodes).difference(shall_fail.union(child_fail)):
             task_no = task_nos[n]
             self.assertIn(task_no, self.ctx.completed_tasks)
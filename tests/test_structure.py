@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import shutil
+import tempfile
 import unittest
 
 import anadama2
@@ -19,18 +20,17 @@ class TestStructure(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        os.environ[anadama2.backends.ENV_VAR] = "/tmp/anadamatest"
+        cls.db_dir = tempfile.mkdtemp(prefix="anadamatest_")
+        os.environ[anadama2.backends.ENV_VAR] = cls.db_dir
     
     @classmethod
     def tearDownClass(cls):
-        if os.path.isdir("/tmp/anadamatest"):
-            shutil.rmtree("/tmp/anadamatest")
+        if os.path.isdir(cls.db_dir):
+            shutil.rmtree(cls.db_dir)
 
 
     def setUp(self):
-        self.workdir = "/tmp/anadama_testdir"
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
         cfg = anadama2.cli.Configuration(prompt_user=False).add("output", type="dir", default=self.workdir)
         self.ctx = anadama2.workflow.Workflow(vars=cfg)
 
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import shutil
+import tempfile
 import unittest
 
 import anadama2
@@ -12,14 +13,18 @@ class TestTracked(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        os.environ[anadama2.backends.ENV_VAR] = "/tmp/anadama_testdb"
-    
+        cls.env_db_dir = tempfile.mkdtemp(prefix="anadama_testdb_")
+        os.environ[anadama2.backends.ENV_VAR] = cls.env_db_dir
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.isdir(cls.env_db_dir):
+            shutil.rmtree(cls.env_db_dir)
+
 
     def setUp(self):
-        self.workdir = "/tmp/anadama_testdir"
-        self.db_dir = "/tmp/anadama_testdb"
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
+        self.db_dir = tempfile.mkdtemp(prefix="anadama_testdb_")
         self.be = anadama2.backends.default(self.db_dir)
 
 
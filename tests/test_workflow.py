@@ -3,6 +3,7 @@ import os
 import sys
 import time
 import shutil
+import tempfile
 import random
 import unittest
 from datetime import datetime
@@ -10,11 +11,11 @@ from datetime import timedelta
 from io import StringIO
 
 import six
-import networkx
 
 import anadama2
 import anadama2.tracked
 import anadama2.workflow
+import anadama2.dag
 import anadama2.util
 import anadama2.cli
 import anadama2.backends
@@ -29,18 +30,17 @@ class TestWorkflow(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        os.environ[anadama2.backends.ENV_VAR] = "/tmp/anadamatest"
+        cls.db_dir = tempfile.mkdtemp(prefix="anadamatest_")
+        os.environ[anadama2.backends.ENV_VAR] = cls.db_dir
     
     @classmethod
     def tearDownClass(cls):
-        if os.path.isdir("/tmp/anadamatest"):
-            shutil.rmtree("/tmp/anadamatest")
+        if os.path.isdir(cls.db_dir):
+            shutil.rmtree(cls.db_dir)
 
 
     def setUp(self):
-        self.workdir = "/tmp/anadama_testdir"
-        if not os.path.isdir(self.workdir):
-            os.mkdir(self.workdir)
+        self.workdir = tempfile.mkdtemp(prefix="anadama_testdir_")
         cfg = anadama2.cli.Configuration(prompt_user=False)
         cfg._arguments["output"].keywords["default"]=self.workdir
         self.ctx = anadama2.workflow.Workflow(vars=cfg)
@@ -58,8 +58,7 @@ class TestWorkflow(unittest.TestCase):
         
 
     def test_hasattributes(self):
-        self.assertIsInstance(self.ctx.dag,
-                              networkx.classes.digraph.DiGraph)
+        self.assertIsInstance(self.ctx.dag, anadama2.dag.DAG)
         self.assertTrue(hasattr(self.ctx, "task_counter"))
         
     def test_get_input_files(self):
@@ -445,6 +444,50 @@ class TestWorkflow(unittest.TestCase):
         self.assertEqual(ctime, os.stat(outf).st_ctime)
 
 
+    def test_go_saves_each_task(self):
+        a, b = [os.path.join(self.workdir, letter+".txt")
+                for letter in ("a", "b")]
+        self.ctx.add_task("touch [targets[0]]", targets=[a])
+        t2 = self.ctx.add_task("touch [targets[0]]", targets=[b], depends=[a])
+
+        saved = []
+        ctx = self.ctx
+        class CustomReporter(anadama2.reporters.ConsoleReporter):
+            def task_completed(self, task_result):
+                if task_result.task_no == t2.task_no:
+                    # the first task was saved before the run finished
+                    saved.append(ctx._backend.lookup(anadama2.tracked.auto(a)))
+                return super(CustomReporter, self).task_completed(task_result)
+            def task_running(self, task_no):
+                pass
+
+        with capture(stderr=StringIO()):
+            self.ctx.go(reporter=CustomReporter(self.ctx))
+        self.assertEqual(len(saved), 1)
+        self.assertIsNotNone(saved[0])
+
+
+    def test_go_skip_batched(self):
+        a, b = [os.path.join(self.workdir, letter+".txt")
+                for letter in ("a", "b")]
+        t1 = self.ctx.add_task("touch [targets[0]]", targets=[a])
+        t2 = self.ctx.add_task("touch [targets[0]]", targets=[b], depends=[a])
+        with capture(stderr=StringIO()):
+            self.ctx.go()
+
+        skipped_calls = []
+        class CustomReporter(anadama2.reporters.ConsoleReporter):
+            def tasks_skipped(self, task_nos):
+                skipped_calls.append(list(task_nos))
+                return super(CustomReporter, self).tasks_skipped(task_nos)
+
+        with capture(stderr=StringIO()):
+            self.ctx.go(reporter=CustomReporter(self.ctx))
+        self.assertEqual(len(skipped_calls), 1)
+        self.assertEqual(sorted(skipped_calls[0]),
+                         sorted([t1.task_no, t2.task_no]))
+
+
     def test_go_skip_notargets(self):
         a,b,c,d = [os.path.join(self.workdir, letter+".txt")
                    for letter in ("a", "b", "c", "d")]
@@ -714,6 +757,17 @@ class TestWorkflow(unittest.TestCase):
                               depends=a, targets=b, name="shouldntfail")
         self.assertEqual(len(self.ctx.tasks), 0)
 
+    def test_nosuchdep_suggestion(self):
+        a = os.path.join(self.workdir, "sample_a.txt")
+        b = os.path.join(self.workdir, "sample_b.txt")
+        self.ctx.strict = True
+        self.ctx.add_task("touch [targets[0]]", targets=a, name="a")
+        with self.assertRaises(KeyError) as cm:
+            self.ctx.add_task("cat [depends[0]] > [targets[0]]",
+                              depends=a+"x", targets=b, name="b")
+        self.assertIn("Perhaps you meant `{}'".format(a), str(cm.exception))
+        self.assertEqual(len(self.ctx.tasks), 1)
+
 
         
 if __name__ == "__main__":